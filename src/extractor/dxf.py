@@ -7,7 +7,10 @@ import ezdxf
 import math
 import numpy as np
 import os
+import shapely
+from ezdxf.math import X_AXIS, Y_AXIS
 from shapely.geometry import LineString, Point, Polygon
+from shapely.geometry.base import BaseGeometry
 
 def arc_to_linestring(center, radius, start_angle, end_angle, num_segments=64):
     """
@@ -42,6 +45,66 @@ def create_ellipse(center, major_axis, minor_axis, start_param, end_param, resol
     points = list(zip(x, y))
     return Polygon(points)
 
+def insert_matrices(insert):
+    """
+        Build affine matrices of every grid element of an INSERT
+        (MINSERT) entity.
+
+        Each matrix has shape (3, 2) where the first two rows are the
+        linear part and the last row is the translation, so block
+        local point `p` ends up in WCS as `p @ m[:2] + m[2]`.
+    """
+
+    m = np.array(list(insert.matrix44().rows()))
+    base = np.vstack((m[:2, :2], m[3, :2]))
+
+    row_count = insert.dxf.row_count
+    column_count = insert.dxf.column_count
+
+    if row_count == 1 and column_count == 1:
+        return base[np.newaxis]
+
+    # Grid offsets are defined in OCS, rotated by insert rotation and not scaled
+    rows, columns = np.meshgrid(np.arange(row_count), np.arange(column_count), indexing='ij')
+    offsets = np.column_stack((columns.ravel() * insert.dxf.column_spacing,
+                               rows.ravel() * insert.dxf.row_spacing))
+
+    # If any spacing is 0, keep only unique locations
+    offsets = np.unique(offsets, axis=0)
+
+    angle = math.radians(insert.dxf.rotation)
+    rotation = np.array([[math.cos(angle), math.sin(angle)],
+                         [-math.sin(angle), math.cos(angle)]])
+
+    ocs = insert.ocs()
+    ocs_to_wcs = np.array([ocs.to_wcs(X_AXIS).vec2, ocs.to_wcs(Y_AXIS).vec2])
+
+    matrices = np.repeat(base[np.newaxis], len(offsets), axis=0)
+    matrices[:, 2] += offsets @ rotation @ ocs_to_wcs
+
+    return matrices
+
+def transform_geometries(geometries, matrices):
+    """
+        Place block geometry (in block local coordinates) at every
+        instance described by `matrices`.
+
+        All instances are transformed at once: coordinates of the
+        tiled geometries are reshaped into (instances, vertices, 2)
+        and multiplied with their instance matrix.
+    """
+
+    count = len(matrices)
+    tiled = np.tile(geometries, count)
+
+    def apply(coords):
+        coords = coords.reshape(count, -1, 2)
+        coords = np.einsum('knj,kji->kni', coords, matrices[:, :2]) + matrices[:, np.newaxis, 2]
+
+        return coords.reshape(-1, 2)
+
+    return list(shapely.transform(tiled, apply))
+
 class DXF:
     """
         Class extracting .dxf entities and converting them into
@@ -99,14 +162,15 @@ class DXF:
         }
 
         if not os.path.exists(path):
-            print(f"File in path {path} does not exist!")
-            print("Exiting...")
-
-            exit(0)
+            raise FileNotFoundError(f"File in path {path} does not exist!")
 
         self.doc = ezdxf.readfile(path)
         self.modelspace = self.doc.modelspace()
 
+        # Geometry of each block definition in block local coordinates,
+        # extracted only once no matter how many times the block is inserted
+        self.blocks = {}
+
         self.extract_entities()
 
     def get_elements(self):
@@ -123,7 +187,21 @@ class DXF:
             Shapely geometry.
         """
 
-        for entity in self.modelspace:
+        inserts = self.extract_layout(self.modelspace, self.elements)
+        self.expand_inserts(inserts, self.elements)
+
+    def extract_layout(self, layout, elements) -> list:
+        """
+            Convert entities of a layout (modelspace or block definition)
+            into Shapely geometry stored in `elements`.
+
+            INSERT entities are not converted here, they are returned
+            so they can be expanded in batches per block.
+        """
+
+        inserts = []
+
+        for entity in layout:
             match entity.dxftype():
                 case 'ARC':
                     center = (entity.dxf.center.x, entity.dxf.center.y)
@@ -132,14 +210,14 @@ class DXF:
                     end_angle = entity.dxf.end_angle
 
                     arc = arc_to_linestring(center, radius, start_angle, end_angle)
-                    self.elements['ARC'].append(arc)
+                    elements['ARC'].append(arc)
 
                 case 'CIRCLE':
                     center = (entity.dxf.center.x, entity.dxf.center.y)
                     radius = entity.dxf.radius
                     
                     circle = Point(center).buffer(radius, resolution=64)
-                    self.elements['CIRCLE'].append(circle)
+                    elements['CIRCLE'].append(circle)
 
                 case 'ELLIPSE':
                     center = (entity.dxf.center.x, entity.dxf.center.y)
@@ -158,29 +236,89 @@ class DXF:
                     minor_axis = minor_axis / minor_axis_length * major_axis_length * ratio
 
                     ellipse = create_ellipse(center, major_axis, minor_axis, start_param, end_param)
-                    self.elements['ELLIPSE'].append(ellipse)
+                    elements['ELLIPSE'].append(ellipse)
 
                 case 'DIMENSION':
-                    self.elements['DIMENSION'].append(entity)
+                    elements['DIMENSION'].append(entity)
+
+                case 'ARC_DIMENSION':
+                    elements['ARC_DIMENSION'].append(entity)
+
+                case 'INSERT':
+                    inserts.append(entity)
 
                 case 'LINE':
                     start_point = (entity.dxf.start.x, entity.dxf.start.y)
                     end_point = (entity.dxf.end.x, entity.dxf.end.y)
 
-                    self.elements['LINE'].append(LineString([start_point, end_point]))
+                    elements['LINE'].append(LineString([start_point, end_point]))
 
                 case 'LWPOLYLINE':
                     points = [(point[0], point[1]) for point in entity]
-                    self.elements['LWPOLYLINE'].append(LineString(points))
+                    elements['LWPOLYLINE'].append(LineString(points))
 
                 case 'SPLINE':
                     control_points = [(p[0], p[1]) for p in entity.control_points]
                     spline_line = LineString(control_points)
 
-                    self.elements['SPLINE'].append(spline_line)
+                    elements['SPLINE'].append(spline_line)
 
                 case _:
-                    self.elements['UNIMPLEMENTED'].append(entity)
+                    elements['UNIMPLEMENTED'].append(entity)
+
+        return inserts
+
+    def expand_inserts(self, inserts, elements) -> None:
+        """
+            Expand INSERT entities into geometry of their blocks.
+
+            Inserts are grouped by block name so each block is
+            transformed once for all of its instances.
+        """
+
+        groups = {}
+        for insert in inserts:
+            groups.setdefault(insert.dxf.name, []).append(insert_matrices(insert))
+
+        for name, matrices in groups.items():
+            block = self.get_block(name)
+            matrices = np.concatenate(matrices)
+
+            for element_type, geometries in block.items():
+                elements[element_type].extend(transform_geometries(geometries, matrices))
+
+    def get_block(self, name) -> dict:
+        """
+            Return geometry of a block definition in block local
+            coordinates, extracting it on first use.
+
+            Nested blocks are expanded into the geometry of
+            the parent block.
+        """
+
+        if name in self.blocks:
+            return self.blocks[name]
+
+        # Guard against self-referencing blocks
+        self.blocks[name] = {}
+
+        layout = self.doc.blocks.get(name)
+        if layout is None:
+            return self.blocks[name]
+
+        elements = {key: [] for key in self.elements}
+
+        inserts = self.extract_layout(layout, elements)
+        self.expand_inserts(inserts, elements)
+
+        # Only Shapely geometry can be transformed, raw entities are left out
+        self.blocks[name] = {
+            element_type: np.array(geometries, dtype=object)
+            for element_type, geometries in elements.items()
+            if geometries and isinstance(geometries[0], BaseGeometry)
+        }
+
+        return self.blocks[name]
 
     # Print found entities
     def print_entities(self) -> None:
@@ -6,23 +6,48 @@
 import os
 import cv2
 import numpy as np
+import shapely
+from shapely.geometry import Polygon
 
 class Image:
 
     # Initialize all variables
-    def __init__(self, path) -> None:
+    def __init__(self, path, mode="contour", output_path="detectedLines.png") -> None:
 
         if not os.path.exists(path):
-            print(f"File in path {path} does not exist!")
-            print("Exiting...")
-
-            exit(0)
+            raise FileNotFoundError(f"File in path {path} does not exist!")
 
         self.image = cv2.imread(path)
+        if self.image is None:
+            raise ValueError(f"File in path {path} is not an image!")
+
+        # Path of the image with detected elements drawn, nothing is saved if empty
+        self.output_path = output_path
 
         self._color_gradation = False
         self._two_color_gradation = False
 
+        # Extraction mode, "contour" for closed shapes or "hough" for line segments
+        self.mode = mode
+
+        # Minimal area (in pixels) of a contour to be taken as a shape
+        self.min_area = 100
+
+        # Contours thinner than this (area / perimeter) are open strokes, not shapes
+        self.min_thickness = 1.5
+
+        # approxPolyDP tolerance relative to contour perimeter
+        self.epsilon = 0.01
+
+        # Maximal number of vertices of a straight polygon
+        self.max_vertices = 8
+
+        # Maximal relative area error of polygon or ellipse fit
+        self.fit_tolerance = 0.02
+
+        # Number of points used to approximate fitted circles and ellipses
+        self.resolution = 64
+
         # Dictionary to store all elements
         # https://ezdxf.readthedocs.io/en/stable/dxfentities/index.html
         self.elements = {
@@ -104,6 +129,177 @@ class Image:
         return (color, thickness)
 
     def execute(self) -> None:
+        if self.mode == "contour":
+            self.execute_contour()
+
+        else:
+            self.execute_hough()
+
+    def fit_contour(self, gray, contour, offset):
+        """
+            Fit a straight polygon, circle or ellipse to the outer
+            contour of a shape and return its element type and
+            polygon in pixel coordinates.
+
+            Anything else is kept as a simplified free curve. The
+            result is moved by `offset` inwards from the outer edge
+            onto the middle of the line.
+        """
+
+        area = cv2.contourArea(contour)
+        perimeter = cv2.arcLength(contour, True)
+        approx = cv2.approxPolyDP(contour, self.epsilon * perimeter, True)
+
+        # Straight polygon, few vertices describing the whole area
+        if len(approx) <= self.max_vertices and abs(cv2.contourArea(approx) - area) <= self.fit_tolerance * area:
+            criteria = (cv2.TERM_CRITERIA_EPS + cv2.TERM_CRITERIA_MAX_ITER, 30, 0.01)
+            corners = cv2.cornerSubPix(gray, approx.astype(np.float32), (3, 3), (-1, -1), criteria)
+
+            polygon = Polygon(corners.reshape(-1, 2)).buffer(-offset, join_style='mitre')
+            return ('LWPOLYLINE', polygon)
+
+        if len(contour) >= 5:
+            (center_x, center_y), (width, height), angle = cv2.fitEllipse(contour)
+
+            if abs(np.pi * width * height / 4 - area) <= self.fit_tolerance * area:
+                a = width / 2 - offset
+                b = height / 2 - offset
+
+                theta = np.linspace(0, 2 * np.pi, self.resolution, endpoint=False)
+                angle = np.radians(angle)
+
+                x = center_x + a * np.cos(theta) * np.cos(angle) - b * np.sin(theta) * np.sin(angle)
+                y = center_y + a * np.cos(theta) * np.sin(angle) + b * np.sin(theta) * np.cos(angle)
+
+                element_type = 'CIRCLE' if abs(width - height) <= self.fit_tolerance * max(width, height) else 'ELLIPSE'
+                return (element_type, Polygon(np.column_stack((x, y))))
+
+        # Free curve, keep vertices within one pixel of the contour
+        curve = Polygon(cv2.approxPolyDP(contour, 1.0, True).reshape(-1, 2)).buffer(-offset)
+        if curve.geom_type == 'MultiPolygon':
+            curve = max(curve.geoms, key=lambda geom: geom.area)
+
+        return ('LWPOLYLINE', curve)
+
+    def shape_contour(self, binary, outer, holes, reach):
+        """
+            Return outer contour of a shape without dimensions
+            attached to it from outside.
+
+            Dimension drawn inside a shape splits it into several
+            holes, they are joined across the dimension line. Holes
+            between extension lines of a dimension drawn outside are
+            left out: extension lines run past the dimension line,
+            so there is ink beyond the joined holes next to them.
+            The largest hole is always kept.
+
+            Joined holes are grown by `reach` (width of the line)
+            and clipped by the outer contour, so the result follows
+            the outer edge wherever nothing is attached to it.
+        """
+
+        polygons = sorted((Polygon(hole.reshape(-1, 2)).buffer(0) for hole in holes), key=lambda polygon: -polygon.area)
+
+        if len(polygons) > 1:
+            # Holes together with the lines around them, without anything inside
+            closed = shapely.union_all([polygon.buffer(reach) for polygon in polygons])
+            filled = shapely.union_all([Polygon(part.exterior) for part in shapely.get_parts(closed)]).buffer(0.5)
+
+            ink = np.argwhere(binary)[:, ::-1]
+            outline = Polygon(outer.reshape(-1, 2)).buffer(0.5)
+            beyond = ink[shapely.contains_xy(outline, ink[:, 0], ink[:, 1]) & ~shapely.contains_xy(filled, ink[:, 0], ink[:, 1])]
+
+            if len(beyond):
+                distances = np.array([shapely.distance(polygon, shapely.points(beyond)) for polygon in polygons])
+                dimensions = set(np.argmin(distances, axis=0).tolist()) - {0}
+
+                polygons = [polygon for i, polygon in enumerate(polygons) if i not in dimensions]
+
+        # Join holes across the lines between them
+        merged = shapely.union_all([polygon.buffer(reach, join_style='mitre', mitre_limit=10) for polygon in polygons])
+        merged = merged.buffer(-reach, join_style='mitre', mitre_limit=10)
+
+        # Back onto the outer edge of the line
+        shape = Polygon(outer.reshape(-1, 2)).buffer(0).intersection(merged.buffer(reach, join_style='mitre', mitre_limit=10))
+        shape = max(shapely.get_parts(shape), key=lambda geom: geom.area)
+
+        return np.array(shape.exterior.coords[:-1], dtype=np.float32).reshape(-1, 1, 2)
+
+    def execute_contour(self) -> None:
+        """
+            Extract closed shapes from contours of the drawing and
+            store them as Shapely polygons.
+
+            Dimensions attached to a shape from outside are cut off
+            using holes inside its line, see `shape_contour`.
+        """
+
+        # Convert image to grayscale
+        gray = cv2.cvtColor(self.image, cv2.COLOR_BGR2GRAY)
+
+        # Lines are dark on light background
+        _, binary = cv2.threshold(gray, 0, 255, cv2.THRESH_BINARY_INV | cv2.THRESH_OTSU)
+
+        # Two level hierarchy: outer edges of shapes and holes inside their lines
+        contours, hierarchy = cv2.findContours(binary, cv2.RETR_CCOMP, cv2.CHAIN_APPROX_NONE)
+
+        if hierarchy is not None:
+            hierarchy = hierarchy[0]
+            areas = np.array([cv2.contourArea(contour) for contour in contours])
+            perimeters = np.array([cv2.arcLength(contour, True) for contour in contours])
+
+            parents = hierarchy[:, 3]
+            holes = parents != -1
+
+            # Group every contour with its outer contour
+            components = np.where(holes, parents, np.arange(len(contours)))
+
+            # Line width of each component: ink area divided by line length (half of all edges)
+            ink = np.bincount(components, weights=np.where(holes, -areas, areas), minlength=len(contours))
+            edges = np.bincount(components, weights=perimeters, minlength=len(contours))
+            strokes = 2 * ink / np.maximum(edges, 1)
+
+            # Shapes without holes are filled, their contour is already the edge of the shape
+            filled = np.bincount(components[holes], minlength=len(contours)) == 0
+            strokes[filled] = 1
+
+            # Open strokes are thin, their area is close to zero
+            shapes = ~holes & (areas >= self.min_area) & (areas >= self.min_thickness * perimeters)
+
+            keys = []
+            polygons = []
+            gray = gray.astype(np.float32)
+
+            for i in np.flatnonzero(shapes):
+                # Contour lies on the outer edge pixels, move to the middle of the line
+                offset = max(strokes[i] - 1, 0) / 2
+
+                contour = contours[i]
+
+                inner = [contours[j] for j in np.flatnonzero(holes & (components == i) & (areas >= self.min_area))]
+                if inner:
+                    contour = self.shape_contour(binary, contour, inner, strokes[i] + 1.5)
+
+                element_type, polygon = self.fit_contour(gray, contour, offset)
+                keys.append(element_type)
+                polygons.append(polygon)
+
+                # Draw the shape on the image
+                points = np.round(np.array(polygon.exterior.coords)).astype(np.int32)
+                cv2.polylines(self.image, [points], True, (0, 255, 0), 2)
+
+            # Flip all shapes at once so y axis points up like in .dxf
+            height = self.image.shape[0]
+            polygons = shapely.transform(np.array(polygons, dtype=object), lambda coords: coords * (1, -1) + (0, height))
+
+            for element_type, polygon in zip(keys, polygons):
+                self.elements[element_type].append(polygon)
+
+        # Save the result image
+        if self.output_path:
+            cv2.imwrite(self.output_path, self.image)
+
+    def execute_hough(self) -> None:
         # Convert image to grayscale
         gray = cv2.cvtColor(self.image, cv2.COLOR_BGR2GRAY)
 
@@ -165,7 +361,8 @@ class Image:
                 cv2.line(self.image, (x1, y1), (x2, y2), color, thickness)
 
         # Save the result image
-        cv2.imwrite('detectedLines.png', self.image)
+        if self.output_path:
+            cv2.imwrite(self.output_path, self.image)
 
     def get_elements(self):
         return self.elements
@@ -0,0 +1,108 @@
+# AUTHOR Andrej Bartulin
+# PROJECT: B.A.G.E.R. parser
+# LICENSE: Polyform Shield License 1.0.0
+# DESCRIPTION: Token stream encoding size and throughput benchmark
+
+import math
+import os
+import sys
+import time
+
+from extractor.dxf import DXF
+from lexer.encoder import decode, decode_all, encode
+from lexer.lexer import Lexer, replay
+from scaler.scaler import Scaler
+from separator.separator import Separator
+from simplifier.simplifier import Simplifier
+
+# Naive encoding is one byte of token code and four bytes of value
+NAIVE_TOKEN_SIZE = 5
+
+# Serial link to the Pico, 115200 baud with 8N1 framing
+SERIAL_BYTES_PER_SECOND = 115200 / 10
+
+def tokenize(path, grid_size, step):
+    """
+        Run the whole pipeline on a sample and return its lexer.
+    """
+
+    elements = DXF(path).get_elements()
+
+    scaler = Scaler(elements)
+    scaler.execute()
+
+    simplifier = Simplifier(elements)
+    simplifier.execute()
+
+    separator = Separator(elements, grid_size)
+
+    lexer = Lexer(*separator.get_shapes(), step)
+    lexer.execute()
+
+    return lexer
+
+def check(lexer, data) -> float:
+    """
+        Replay decoded stream and check the body ends every
+        polygon within one unit of where it was planned to.
+        Return the largest distance.
+    """
+
+    polygons = decode_all(data)
+    assert polygons == lexer.get_tokens(), "Decoded tokens differ from encoded ones!"
+
+    position = lexer.start
+    largest = 0.0
+
+    for tokens, end in zip(polygons, lexer.ends):
+        position = replay(tokens, position)
+        distance = math.dist(position, end)
+
+        assert distance < 1, f"Body ends {distance:.2f} away from {end}!"
+        largest = max(largest, distance)
+
+    return largest
+
+def benchmark(paths, grid_size=5, step=5, repeat=3) -> None:
+    """
+        Print output size, serial upload time and encode/decode
+        throughput of every sample.
+    """
+
+    print(f"{'sample':<40} {'tokens':>7} {'naive [B]':>10} {'rle+delta [B]':>14} {'+dict [B]':>10} "
+          f"{'upload [s]':>16} {'encode [tok/s]':>15} {'decode [tok/s]':>15} {'error':>6}")
+
+    for path in paths:
+        lexer = tokenize(path, grid_size, step)
+        polygons = lexer.get_tokens()
+        count = sum(len(tokens) for tokens in polygons)
+        if count == 0:
+            continue
+
+        naive = count * NAIVE_TOKEN_SIZE
+        plain = len(encode(polygons, dictionary=False))
+
+        encode_time = float("inf")
+        for _ in range(repeat):
+            start = time.perf_counter()
+            data = encode(polygons)
+            encode_time = min(encode_time, time.perf_counter() - start)
+
+        decode_time = float("inf")
+        for _ in range(repeat):
+            start = time.perf_counter()
+            for _ in decode(data):
+                pass
+            decode_time = min(decode_time, time.perf_counter() - start)
+
+        error = check(lexer, data)
+
+        upload = f"{naive / SERIAL_BYTES_PER_SECOND:.2f} -> {len(data) / SERIAL_BYTES_PER_SECOND:.3f}"
+
+        print(f"{os.path.basename(path):<40} {count:>7} {naive:>10} {plain:>14} {len(data):>10} "
+              f"{upload:>16} {count / encode_time:>15.0f} {count / decode_time:>15.0f} {error:>6.2f}")
+
+if __name__ == "__main__":
+    paths = sys.argv[1:] or [os.path.join("dxf", name) for name in sorted(os.listdir("dxf"))]
+
+    benchmark(paths)
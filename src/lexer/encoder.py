@@ -0,0 +1,316 @@
+# AUTHOR Andrej Bartulin
+# PROJECT: B.A.G.E.R. parser
+# LICENSE: Polyform Shield License 1.0.0
+# DESCRIPTION: Token stream encoder and streaming decoder
+
+# Stream layout, for each polygon:
+#
+#   DICTIONARY count (length (code value)*)*  optional, dig patterns of at most
+#                                             MAX_PERIOD tokens, values as
+#                                             zig-zag varints
+#   record*                                   see opcodes below
+#   END
+#
+# Records:
+#   code delta          token `code` (< 0x40) with value given as zig-zag
+#                       varint delta from the previous value of the same code
+#   REF | index         tokens of dictionary entry `index` (< 0x40)
+#   REPEAT period count repeat last `period` tokens `count` more times
+#
+# Decoder state is tiny and fixed in size (last value of every code, last
+# MAX_PERIOD tokens and at most MAX_DICTIONARY patterns of MAX_PERIOD tokens)
+# so it can run on the Pico while bytes arrive over serial.
+
+REF = 0x80
+REPEAT = 0x40
+DICTIONARY = 0x41
+END = 0x7F
+
+MAX_CODE = 0x40
+MAX_PERIOD = 4
+MAX_DICTIONARY = 0x40
+
+def zigzag(value) -> int:
+    """
+        Map signed integer to unsigned (0, -1, 1, -2 ... -> 0, 1, 2, 3 ...).
+    """
+
+    return (value << 1) ^ (value >> 63)
+
+def unzigzag(value) -> int:
+    """
+        Inverse of `zigzag`.
+    """
+
+    return (value >> 1) ^ -(value & 1)
+
+def write_varint(output, value) -> None:
+    """
+        Append unsigned integer as LEB128 varint.
+    """
+
+    while value >= 0x80:
+        output.append((value & 0x7F) | 0x80)
+        value >>= 7
+
+    output.append(value)
+
+def read_varint(stream) -> int:
+    """
+        Read LEB128 varint from an iterator of bytes.
+    """
+
+    value = 0
+    shift = 0
+
+    while True:
+        byte = next(stream)
+        value |= (byte & 0x7F) << shift
+        shift += 7
+
+        if byte < 0x80:
+            return value
+
+def find_runs(tokens):
+    """
+        Split tokens into (start, period, count) runs where
+        `tokens[start:start + period]` is repeated `count` times.
+
+        At each position the period covering most tokens wins,
+        a single token has period 1 and count 1.
+    """
+
+    runs = []
+    i = 0
+
+    while i < len(tokens):
+        best_period, best_count = 1, 1
+
+        for period in range(1, MAX_PERIOD + 1):
+            pattern = tokens[i:i + period]
+            if len(pattern) < period:
+                break
+
+            count = 1
+            while tokens[i + count * period:i + (count + 1) * period] == pattern:
+                count += 1
+
+            if count > 1 and period * count > best_period * best_count:
+                best_period, best_count = period, count
+
+        runs.append((i, best_period, best_count))
+        i += best_period * best_count
+
+    return runs
+
+def varint_size(value) -> int:
+    """
+        Return number of bytes of unsigned integer as LEB128 varint.
+    """
+
+    return max(1, (value.bit_length() + 6) // 7)
+
+def find_patterns(tokens, runs):
+    """
+        Return (pattern, count) of every run. Tokens between
+        repeated runs (e.g. the move to the next line) are joined
+        into patterns of at most MAX_PERIOD tokens.
+    """
+
+    patterns = []
+    literal = []
+
+    for start, period, count in runs:
+        if count == 1:
+            literal.extend(tokens[start:start + period])
+            continue
+
+        for i in range(0, len(literal), MAX_PERIOD):
+            patterns.append((tuple(literal[i:i + MAX_PERIOD]), 1))
+        literal = []
+
+        patterns.append((tuple(tokens[start:start + period]), count))
+
+    for i in range(0, len(literal), MAX_PERIOD):
+        patterns.append((tuple(literal[i:i + MAX_PERIOD]), 1))
+
+    return patterns
+
+def build_dictionary(patterns):
+    """
+        Return dig patterns worth storing in the dictionary,
+        most bytes saved first.
+
+        Every use of an entry is a single REF byte. Tokens of
+        patterns not worth an entry of their own can still be
+        entries one by one, e.g. the BUCKET between moves.
+    """
+
+    def saved(frequency):
+        result = {}
+        for pattern, uses in frequency.items():
+            size = sum(1 + varint_size(zigzag(value)) for _, value in pattern)
+
+            # Entry costs its length byte and tokens, each use saves all but the REF byte
+            result[pattern] = uses * (size - 1) - (1 + size)
+
+        return result
+
+    frequency = {}
+    for pattern, _ in patterns:
+        frequency[pattern] = frequency.get(pattern, 0) + 1
+
+    sequences = saved(frequency)
+    entries = [pattern for pattern in sequences if len(pattern) > 1 and sequences[pattern] > 0]
+
+    frequency = {}
+    for pattern, _ in patterns:
+        if pattern not in entries:
+            for token in pattern:
+                frequency[(token,)] = frequency.get((token,), 0) + 1
+
+    tokens = saved(frequency)
+    entries += [pattern for pattern in tokens if tokens[pattern] > 0]
+
+    sequences.update(tokens)
+    entries.sort(key=lambda pattern: -sequences[pattern])
+
+    return entries[:MAX_DICTIONARY]
+
+def encode(polygons, dictionary=True) -> bytes:
+    """
+        Encode tokens of every polygon (lists of (code, value)
+        tuples) into a compressed byte stream.
+    """
+
+    output = bytearray()
+
+    # Previous value of each code, shared across polygons like in the decoder
+    last = [0] * MAX_CODE
+
+    for tokens in polygons:
+        tokens = [(int(code), int(value)) for code, value in tokens]
+        patterns = find_patterns(tokens, find_runs(tokens))
+
+        entries = build_dictionary(patterns) if dictionary else []
+        indices = {pattern: index for index, pattern in enumerate(entries)}
+
+        if entries:
+            output.append(DICTIONARY)
+            write_varint(output, len(entries))
+
+            for pattern in entries:
+                output.append(len(pattern))
+
+                for code, value in pattern:
+                    output.append(code)
+                    write_varint(output, zigzag(value))
+
+        for pattern, count in patterns:
+            if pattern in indices:
+                output.append(REF | indices[pattern])
+
+            else:
+                for code, value in pattern:
+                    if ((code, value),) in indices:
+                        output.append(REF | indices[((code, value),)])
+
+                    else:
+                        output.append(code)
+                        write_varint(output, zigzag(value - last[code]))
+
+                    last[code] = value
+
+            # Decoder updates last values for tokens of entries too
+            for code, value in pattern:
+                last[code] = value
+
+            if count > 1:
+                output.append(REPEAT)
+                output.append(len(pattern))
+                write_varint(output, count - 1)
+
+        output.append(END)
+
+    return bytes(output)
+
+def decode(stream):
+    """
+        Decode byte stream produced by `encode`, yielding
+        (polygon, code, value) as soon as each token is read
+        and (polygon, END, 0) when polygon is finished.
+
+        `stream` is any iterable of bytes, e.g. bytes read one
+        by one from the serial line.
+    """
+
+    stream = iter(stream)
+
+    last = [0] * MAX_CODE
+    history = [(0, 0)] * MAX_PERIOD
+    head = 0
+    entries = []
+    polygon = 0
+
+    for opcode in stream:
+        if opcode == END:
+            yield (polygon, END, 0)
+
+            polygon += 1
+            entries = []
+            continue
+
+        if opcode == DICTIONARY:
+            entries = []
+            for _ in range(read_varint(stream)):
+                pattern = []
+                for _ in range(next(stream)):
+                    code = next(stream)
+                    pattern.append((code, unzigzag(read_varint(stream))))
+
+                entries.append(pattern)
+
+            continue
+
+        if opcode == REPEAT:
+            period = next(stream)
+            count = read_varint(stream)
+
+            # Ring buffer of last MAX_PERIOD tokens
+            pattern = [history[(head - period + i) % MAX_PERIOD] for i in range(period)]
+            for _ in range(count):
+                for code, value in pattern:
+                    history[head] = (code, value)
+                    head = (head + 1) % MAX_PERIOD
+                    yield (polygon, code, value)
+
+            continue
+
+        if opcode & REF:
+            pattern = entries[opcode & ~REF]
+
+        else:
+            pattern = [(opcode, last[opcode] + unzigzag(read_varint(stream)))]
+
+        for code, value in pattern:
+            last[code] = value
+            history[head] = (code, value)
+            head = (head + 1) % MAX_PERIOD
+
+            yield (polygon, code, value)
+
+def decode_all(data) -> list:
+    """
+        Decode whole byte stream into tokens of every polygon.
+    """
+
+    polygons = [[]]
+    for polygon, code, value in decode(data):
+        if code == END:
+            polygons.append([])
+
+        else:
+            polygons[polygon].append((code, value))
+
+    # Drop list opened after the last END
+    return polygons[:-1]
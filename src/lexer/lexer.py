@@ -3,34 +3,147 @@
 # LICENSE: Polyform Shield License 1.0.0
 # DESCRIPTION: Lexer entry file
 
+import math
+
+from lexer.token import *
+
+def replay(tokens, start=(0, 0)):
+    """
+        Return position of the body after executing body
+        movement tokens from `start`.
+    """
+
+    x, y = start
+
+    for token, value in tokens:
+        match token:
+            case Movement.FORWARD:
+                x += value
+
+            case Movement.BACK:
+                x -= value
+
+            case Movement.LEFT:
+                y += value
+
+            case Movement.RIGHT:
+                y -= value
+
+    return (x, y)
+
 class Lexer:
     """
         Tokenize every polygon division.
 
+        Division lines are dug one after another, alternating
+        direction. Body moves FORWARD/BACK along x and LEFT/RIGHT
+        along y, bucket digs once every `step` along the line.
+        Moves are relative and in whole units, every polygon
+        starts with a move from where the previous one ended
+        (or from `start` for the first one).
+
         Attributes:
             polygons(list): list of polygons
             divisions(list): list of lines (divisions) FOR EACH polygon
+            step(float): distance between two bucket digs along a line
+            start(tuple): starting position of the body
     """
 
-    def __init__(self, polygons, divisions):
+    def __init__(self, polygons, divisions, step=25, start=(0, 0)):
         """
             Initialize all the variables.
         """
 
         self.polygons = polygons
         self.divisions = divisions
+        self.step = step
+        self.start = start
+
+        # Position of the body after all emitted moves, always in whole units
+        # so rounding errors of single moves do not add up
+        self.position = (round(start[0]), round(start[1]))
+
+        # List of (token, value) tuples FOR EACH polygon
+        self.tokens = []
+
+        # Planned (not rounded) position at the end of each polygon
+        self.ends = []
+
+    def move(self, tokens, target) -> None:
+        """
+            Add body movement from the current position to
+            `target` rounded to whole units.
+        """
+
+        x, y = round(target[0]), round(target[1])
+        dx, dy = x - self.position[0], y - self.position[1]
+
+        if dx != 0:
+            tokens.append((Movement.FORWARD, dx) if dx > 0 else (Movement.BACK, -dx))
+
+        if dy != 0:
+            tokens.append((Movement.LEFT, dy) if dy > 0 else (Movement.RIGHT, -dy))
+
+        self.position = (x, y)
+
+    def tokenize(self, division, position) -> list:
+        """
+            Tokenize division lines of one polygon, starting
+            at planned `position`. Return tokens and planned
+            position at the end.
+        """
+
+        tokens = []
+
+        lines = sorted(division, key=lambda line: (line.bounds[1], line.bounds[0]))
+
+        for line in lines:
+            start, end = line.coords[0], line.coords[-1]
+
+            # Start from the end closer to the current position
+            if math.dist(position, end) < math.dist(position, start):
+                start, end = end, start
+
+            self.move(tokens, start)
+
+            length = end[0] - start[0]
+            direction = 1 if length >= 0 else -1
+            remaining = abs(length)
+            x = start[0]
+
+            tokens.append((Arm.BUCKET, 0))
+            while remaining > 0:
+                distance = min(self.step, remaining)
+                x += direction * distance
+
+                self.move(tokens, (x, start[1]))
+                tokens.append((Arm.BUCKET, 0))
+
+                remaining -= distance
+
+            position = end
+
+        return (tokens, position)
 
     def execute(self):
         """
             Tokenize.
         """
-        
-        for polygon, division in zip(self.polygons, self.divisions):
-            print("--- SHAPE ----: ")
-            print(polygon)
 
-            print("--- DIVISIONS ---: ")
-            for line in division:
-                print(line)
-            
-            print("----------------------------------------")
+        self.tokens = []
+        self.ends = []
+        self.position = (round(self.start[0]), round(self.start[1]))
+
+        position = self.start
+        for division in self.divisions:
+            tokens, position = self.tokenize(division, position)
+
+            self.tokens.append(tokens)
+            self.ends.append(position)
+
+    def get_tokens(self):
+        """
+            Return tokens of every polygon.
+        """
+
+        return self.tokens
@@ -9,11 +9,11 @@ import sys
 import toml
 
 from config.position import *
-from extractor.dxf import *
-from extractor.image import *
-from lexer.lexer import *
+from lexer.encoder import encode
+from pipeline.pipeline import *
 from positioner.positioner import *
-from separator.separator import *
+from separator.separator import plot_grid
+from service.service import *
 
 if __name__ == "__main__":
     config_path: str = ""
@@ -33,26 +33,43 @@ if __name__ == "__main__":
     parsed_toml = toml.load(config_path)
     print(colorama.Fore.LIGHTRED_EX + "B.A.G.E.R. parser" + colorama.Fore.RESET)
 
+    # Keep warm workers and accept jobs instead of parsing a single drawing
+    if "--serve" in sys.argv:
+        service = Service(parsed_toml.get('service', {}))
+        service.execute()
+
+        exit(0)
+
     position = Position(parsed_toml['paths']['position_path'])
-    extractor = None
 
-    if (parsed_toml['extractor']['type'] == "dxf"):
-        extractor = DXF(parsed_toml['paths']['dxf_path'])
+    extractor_type = parsed_toml['extractor']['type']
 
-    elif (parsed_toml["extractor"]['type'] == "image"):
-        extractor = Image(parsed_toml['paths']['image_path'])
-        extractor.execute()
+    try:
+        geometry = extract(
+            parsed_toml['paths'].get(f"{extractor_type}_path", ""),
+            extractor_type,
+            parsed_toml['extractor'].get('image_mode', "contour"),
+            output_path="detectedLines.png",
+        )
 
-    if extractor != None:
-        elements = extractor.get_elements()
-        separator = Separator(elements)
+    except (FileNotFoundError, ValueError) as error:
+        print(error)
+        print("Exiting...")
 
-        polygons, grids = separator.get_shapes()
+        exit(1)
 
-        positioner = Positioner(polygons, grids)
-        lexer = Lexer(polygons, grids)
+    divisions = separate(geometry, parsed_toml.get('simplifier', {}))
 
-        positioner.execute()
-        lexer.execute()
-        
-        separator.plot_grid()
+    positioner = Positioner(divisions.polygons, divisions.divisions)
+    positioner.execute()
+
+    # Encoded token stream is what gets uploaded to the Pico
+    data = encode(lex(divisions))
+
+    output_path = parsed_toml['paths'].get('output_path', "output.bin")
+    with open(output_path, "wb") as file:
+        file.write(data)
+
+    print(f"Wrote {len(data)} bytes to {output_path}")
+
+    plot_grid(divisions.polygons, divisions.divisions)
@@ -0,0 +1,124 @@
+# AUTHOR Andrej Bartulin
+# PROJECT: B.A.G.E.R. parser
+# LICENSE: Polyform Shield License 1.0.0
+# DESCRIPTION: Re-entrant pipeline entry file
+
+# Every function here creates its own extractor/separator/lexer objects and
+# never mutates its input, so drawings can be processed from many threads or
+# processes at once. Errors are raised, nothing calls exit().
+
+import os
+from typing import NamedTuple
+
+import shapely
+from shapely.geometry import LineString, Polygon
+from shapely.geometry.base import BaseGeometry
+
+from extractor.dxf import DXF
+from extractor.image import Image
+from lexer.lexer import Lexer
+from scaler.scaler import Scaler
+from separator.separator import Separator
+from simplifier.simplifier import Simplifier
+
+class Geometry(NamedTuple):
+    """
+        Extracted drawing in real units.
+
+        Attributes:
+            elements(dict): extracted Shapely geometry by entity type
+            scale(float): scale applied to the drawing, solved from its dimensions
+    """
+
+    elements: dict
+    scale: float
+
+class Divisions(NamedTuple):
+    """
+        Work areas and their division lines.
+
+        Attributes:
+            polygons(list): list of polygons
+            divisions(list): list of lines (divisions) FOR EACH polygon
+    """
+
+    polygons: list
+    divisions: list
+
+def extract(source, extractor=None, image_mode="contour", output_path=None) -> Geometry:
+    """
+        Extract geometry of a drawing and scale it to real units.
+
+        Extractor ("dxf" or "image") is guessed from the file
+        extension if not given. Image extractor saves detected
+        shapes to `output_path` if given; leave it empty when
+        extracting from several threads.
+    """
+
+    if extractor is None:
+        extractor = "dxf" if source.lower().endswith(".dxf") else "image"
+
+    if extractor not in ("dxf", "image"):
+        raise ValueError(f"Unknown extractor {extractor}!")
+
+    if not os.path.isfile(source):
+        raise FileNotFoundError(f"File in path {source} does not exist!")
+
+    match extractor:
+        case "dxf":
+            elements = DXF(source).get_elements()
+
+        case "image":
+            image = Image(source, image_mode, output_path)
+            image.execute()
+
+            elements = image.get_elements()
+
+    scaler = Scaler(elements)
+    scaler.execute()
+
+    # Raw entities (dimensions, unimplemented) are not needed any more
+    elements = {
+        element_type: [entity for entity in entities if isinstance(entity, BaseGeometry)]
+        for element_type, entities in elements.items()
+    }
+
+    return Geometry(elements, scaler.get_scale()[0])
+
+def separate(geometry, params=None) -> Divisions:
+    """
+        Simplify geometry and divide it into work areas.
+
+        `params` is a dictionary with optional `tolerance`,
+        `precision`, `grid_size` and `is_curved` keys.
+    """
+
+    params = params or {}
+
+    # Simplifier works in place, keep the given geometry untouched
+    elements = {element_type: list(entities) for element_type, entities in geometry.elements.items()}
+
+    simplifier = Simplifier(elements, params.get('tolerance', 0.5), params.get('precision', 0.01))
+    simplifier.execute()
+
+    # Snapping can split a polygon into several, pass the separator only parts
+    # it can assemble so it never reports unknown entities (prints from threads)
+    elements = {
+        element_type: [part for part in shapely.get_parts(entities) if isinstance(part, (LineString, Polygon))]
+        for element_type, entities in elements.items()
+    }
+
+    separator = Separator(elements, params.get('grid_size', 25), params.get('is_curved', True))
+
+    return Divisions(*separator.get_shapes())
+
+def lex(divisions, step=25) -> list:
+    """
+        Tokenize divisions, return list of (token, value)
+        tuples FOR EACH polygon.
+    """
+
+    lexer = Lexer(divisions.polygons, divisions.divisions, step)
+    lexer.execute()
+
+    return lexer.get_tokens()
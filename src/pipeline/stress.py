@@ -0,0 +1,82 @@
+# AUTHOR Andrej Bartulin
+# PROJECT: B.A.G.E.R. parser
+# LICENSE: Polyform Shield License 1.0.0
+# DESCRIPTION: Pipeline thread safety stress test
+
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import shapely
+from shapely.geometry import GeometryCollection, MultiLineString
+
+from pipeline.pipeline import extract, lex, separate
+
+def run(path):
+    """
+        Run the whole pipeline on a drawing and return its output
+        in a comparable form (WKB of divided polygons and tokens).
+    """
+
+    divisions = separate(extract(path))
+    tokens = lex(divisions)
+
+    shapes = GeometryCollection([
+        GeometryCollection([polygon, MultiLineString(list(division))])
+        for polygon, division in zip(divisions.polygons, divisions.divisions)
+    ])
+
+    return (shapely.to_wkb(shapes), [[(int(token), value) for token, value in polygon] for polygon in tokens])
+
+def attempt(path):
+    """
+        Run `run` on a drawing, return (output, None) or
+        (None, error) if it raised.
+    """
+
+    try:
+        return (run(path), None)
+
+    except Exception as error:
+        return (None, f"{type(error).__name__}: {error}")
+
+def stress(paths, threads=16, rounds=4) -> bool:
+    """
+        Run every drawing serially, then `rounds` times on
+        `threads` threads at once and compare the results.
+    """
+
+    start = time.perf_counter()
+    serial_results = [attempt(path) for path in paths]
+    serial = time.perf_counter() - start
+
+    jobs = paths * rounds
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(threads) as executor:
+        results = list(executor.map(attempt, jobs))
+    parallel = time.perf_counter() - start
+
+    # Any error fails the run, even one raised the same way serially
+    errors = [(path, error) for path, (_, error) in zip(paths + jobs, serial_results + results) if error is not None]
+    for path, error in sorted(set(errors)):
+        print(f"{path} failed: {error}")
+
+    expected = {path: output for path, (output, _) in zip(paths, serial_results)}
+    mismatches = [
+        path for path, (output, error) in zip(jobs, results)
+        if error is None and expected[path] is not None and output != expected[path]
+    ]
+    for path in sorted(set(mismatches)):
+        print(f"{path} differs from serial run!")
+
+    print(f"{len(jobs)} jobs on {threads} threads: {len(errors)} errors, {len(mismatches)} mismatches, "
+          f"serial {serial * rounds:.2f} s, parallel {parallel:.2f} s")
+
+    return not errors and not mismatches
+
+if __name__ == "__main__":
+    paths = sys.argv[1:] or [os.path.join("dxf", name) for name in sorted(os.listdir("dxf"))]
+
+    sys.exit(0 if stress(paths) else 1)
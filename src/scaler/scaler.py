@@ -0,0 +1,200 @@
+# AUTHOR Andrej Bartulin
+# PROJECT: B.A.G.E.R. parser
+# LICENSE: Polyform Shield License 1.0.0
+# DESCRIPTION: Scaler entry file
+
+import math
+import re
+import numpy as np
+import shapely
+from ezdxf.tools.text import plain_mtext
+from shapely.geometry.base import BaseGeometry
+
+# https://ezdxf.readthedocs.io/en/stable/dxfentities/dimension.html
+LINEAR = 0
+ALIGNED = 1
+DIAMETER = 3
+RADIUS = 4
+ARC = 8
+
+# Whole override has to be a single number, optionally with radius/diameter
+# prefix and unit suffix, e.g. "R25", "Ø12,5", "100 mm"
+DIMENSION_TEXT = re.compile(r"(?:[RØ⌀]\s*)?([-+]?\d+(?:[.,]\d+)?)\s*(?:[a-zA-Z]+)?")
+
+def parse_dimension_text(text):
+    """
+        Return number written in the dimension text override or
+        None if the text shows the measured value (`<>` or empty).
+        Text which is not a single number is NaN.
+    """
+
+    if not text or "<>" in text:
+        return None
+
+    # Drop MTEXT formatting codes (\A1;, {\H0.7x;...}) and expand %%c and friends
+    number = DIMENSION_TEXT.fullmatch(plain_mtext(text).strip())
+    if number is None:
+        return math.nan
+
+    return float(number.group(1).replace(",", "."))
+
+def measure_dimensions(defpoints, dimtypes, angles):
+    """
+        Measure all dimensions at once from their defining points.
+
+        `defpoints` has shape (n, 4, 2) and holds `defpoint`,
+        `defpoint2`, `defpoint3` and `defpoint4` of each dimension.
+        Dimensions which do not measure length (angular, ordinate)
+        are NaN.
+    """
+
+    p1, p2, p3, p4 = defpoints[:, 0], defpoints[:, 1], defpoints[:, 2], defpoints[:, 3]
+
+    # Linear dimension is projected onto the dimension line direction
+    direction = np.column_stack((np.cos(angles), np.sin(angles)))
+    linear = np.abs(np.sum((p3 - p2) * direction, axis=1))
+
+    aligned = np.linalg.norm(p3 - p2, axis=1)
+    diameter = np.linalg.norm(p1 - p4, axis=1)
+
+    # Arc length from center (defpoint4) and arc end points (defpoint2, defpoint3)
+    start = p2 - p4
+    end = p3 - p4
+    sweep = np.arctan2(end[:, 1], end[:, 0]) - np.arctan2(start[:, 1], start[:, 0])
+    arc = np.linalg.norm(start, axis=1) * np.mod(sweep, 2 * np.pi)
+
+    return np.select(
+        [dimtypes == LINEAR, dimtypes == ALIGNED, dimtypes == DIAMETER, dimtypes == RADIUS, dimtypes == ARC],
+        [linear, aligned, diameter, diameter, arc],
+        default=np.nan,
+    )
+
+class Scaler:
+    """
+        Solve real world scale of the drawing from its dimensions
+        and apply it to all extracted entities.
+
+        Attributes:
+            elements(dict): extracted entities converted into a Shapely form
+            tolerance(float): relative error above which dimension is reported as inconsistent
+    """
+
+    def __init__(self, elements, tolerance=1e-3):
+        """
+            Initialize all the variables.
+        """
+
+        self.elements = elements
+        self.tolerance = tolerance
+
+        # Drawing units to real units
+        self.scale = 1.0
+
+        # Dimensions not agreeing with the solved scale
+        self.inconsistencies = []
+
+    def execute(self) -> None:
+        """
+            Solve scale from dimensions and apply it.
+        """
+
+        dimensions = self.elements['DIMENSION'] + self.elements['ARC_DIMENSION']
+        if not dimensions:
+            return
+
+        drawn, stated = self.extract_measurements(dimensions)
+        self.solve_scale(dimensions, drawn, stated)
+
+        if self.scale != 1.0:
+            self.apply_scale()
+
+    def extract_measurements(self, dimensions):
+        """
+            Return drawn length and stated (real world) value
+            of every dimension.
+        """
+
+        count = len(dimensions)
+
+        defpoints = np.zeros((count, 4, 2))
+        dimtypes = np.empty(count, dtype=int)
+        angles = np.zeros(count)
+        stated = np.empty(count)
+        factors = np.ones(count)
+        overrides = np.zeros(count, dtype=bool)
+
+        for i, dimension in enumerate(dimensions):
+            dxf = dimension.dxf
+
+            for j, name in enumerate(('defpoint', 'defpoint2', 'defpoint3', 'defpoint4')):
+                point = dxf.get(name) if dxf.is_supported(name) else None
+                if point is not None:
+                    defpoints[i, j] = (point[0], point[1])
+
+            # ARC_DIMENSION may be stored with dimtype of an angular dimension
+            dimtypes[i] = ARC if dimension.dxftype() == 'ARC_DIMENSION' else dimension.dimtype
+
+            if dxf.is_supported('angle'):
+                angles[i] = math.radians(dxf.get('angle', 0.0))
+            factors[i] = dimension.override().get('dimlfac', 1.0)
+
+            value = parse_dimension_text(dxf.get('text'))
+            if value is not None:
+                stated[i] = value
+                overrides[i] = True
+
+        drawn = measure_dimensions(defpoints, dimtypes, angles)
+
+        # Without text override dimension shows measurement multiplied by DIMLFAC
+        stated = np.where(overrides, stated, drawn * factors)
+
+        return (drawn, stated)
+
+    def solve_scale(self, dimensions, drawn, stated) -> None:
+        """
+            Least squares solution of `scale * drawn = stated`
+            across all dimensions.
+        """
+
+        valid = np.isfinite(drawn) & np.isfinite(stated) & (drawn > 0)
+        if not np.any(valid):
+            return
+
+        self.scale = float(np.dot(drawn[valid], stated[valid]) / np.dot(drawn[valid], drawn[valid]))
+
+        error = np.abs(self.scale * drawn - stated) / np.maximum(np.abs(stated), 1e-12)
+        for i in np.flatnonzero(valid & (error > self.tolerance)):
+            self.inconsistencies.append((dimensions[i], float(drawn[i]), float(stated[i])))
+
+            print(f"Dimension {dimensions[i].dxf.handle} states {stated[i]} "
+                  f"but measures {drawn[i] * self.scale} with scale {self.scale}!")
+
+    def apply_scale(self) -> None:
+        """
+            Scale all extracted geometry in a single transform.
+        """
+
+        keys = []
+        geometries = []
+
+        for element_type, entities in self.elements.items():
+            for i, entity in enumerate(entities):
+                if isinstance(entity, BaseGeometry):
+                    keys.append((element_type, i))
+                    geometries.append(entity)
+
+        scaled = shapely.transform(np.array(geometries, dtype=object), lambda coords: coords * self.scale)
+        for (element_type, i), geometry in zip(keys, scaled):
+            self.elements[element_type][i] = geometry
+
+        # Points from image extractor are plain tuples
+        if self.elements['POINTS']:
+            points = np.asarray(self.elements['POINTS'], dtype=float) * self.scale
+            self.elements['POINTS'] = [tuple(point) for point in points]
+
+    def get_scale(self):
+        """
+            Return solved scale and dimensions not agreeing with it.
+        """
+
+        return (self.scale, self.inconsistencies)
@@ -7,6 +7,8 @@ import cv2
 import math
 import matplotlib.pyplot as plt
 import numpy as np
+import shapely
+from concurrent.futures import ThreadPoolExecutor
 from shapely.geometry import LineString, MultiPolygon, Point, Polygon
 from shapely.ops import unary_union
 
@@ -23,6 +25,112 @@ def calculate_angle(p1, p2):
     angle = abs(math.degrees(math.atan2(dy, dx)))
     return angle
 
+def plot_grid(polygons, divisions) -> None:
+    """
+        Plot divided polygons on the screen.
+    """
+
+    fig, ax = plt.subplots()
+    for polygon, division in zip(polygons, divisions):
+        if isinstance(polygon, Polygon):
+            # Plot the polygon
+            x, y = polygon.exterior.xy
+            ax.plot(x, y, color='black')
+
+        elif isinstance(polygon, MultiPolygon):
+            for geom in polygon.geoms:
+                xs, ys = geom.exterior.xy    
+                ax.fill(xs, ys, alpha=0.5, fc='r', ec='none')
+
+        # Plot the divisions
+        for line in division:
+            if isinstance(line, LineString):
+                x, y = line.xy
+                ax.plot(x, y, color='blue')
+            elif isinstance(line, Polygon):
+                x, y = line.exterior.xy  # Fix: Directly get exterior coordinates
+                ax.plot(x, y, color='blue')
+            elif isinstance(line, MultiPolygon):
+                for geom in line.geoms:
+                    x, y = geom.exterior.xy
+                    ax.plot(x, y, color='blue')
+
+    plt.show()
+
+def find_clusters(count, pairs):
+    """
+        Label connected components of `count` nodes connected
+        by `pairs` (array of shape (2, n)) using union-find.
+    """
+
+    parents = list(range(count))
+
+    def find(node):
+        while parents[node] != node:
+            parents[node] = parents[parents[node]]
+            node = parents[node]
+
+        return node
+
+    for a, b in zip(*pairs):
+        root_a, root_b = find(a), find(b)
+        if root_a != root_b:
+            parents[max(root_a, root_b)] = min(root_a, root_b)
+
+    return np.array([find(node) for node in range(count)])
+
+def nesting_depths(polygons, covers):
+    """
+        Return nesting depth of every polygon, given `covers`
+        pairs (array of shape (2, n)) of a polygon and a polygon
+        it covers.
+
+        Depth is one more than the deepest polygon covering it,
+        so overlapping work areas around an island do not add
+        up. Covering (not only properly containing) also nests
+        an island touching the outline, e.g. a pillar by a wall.
+    """
+
+    containers, contained = covers
+
+    # Drop polygons covering themselves and equal polygons covering each other
+    pairs = set(zip(containers.tolist(), contained.tolist()))
+    parents = [[] for _ in polygons]
+    for container, polygon in pairs:
+        if container != polygon and (polygon, container) not in pairs:
+            parents[polygon].append(container)
+
+    # Polygon covering another one is larger, so bigger ones are done first
+    depths = np.zeros(len(polygons), dtype=int)
+    for polygon in np.argsort(-shapely.area(polygons), kind='stable'):
+        if parents[polygon]:
+            depths[polygon] = 1 + max(depths[parent] for parent in parents[polygon])
+
+    return depths
+
+def merge_cluster(polygons, depths):
+    """
+        Merge polygons of one cluster.
+
+        Polygons nested inside an odd number of other polygons
+        are holes (islands not to dig), others are areas to dig.
+        Levels are applied from the outermost one so an area
+        inside a hole is kept.
+    """
+
+    merged = Polygon()
+
+    for depth in np.unique(depths):
+        level = unary_union(polygons[depths == depth])
+
+        if depth % 2 == 0:
+            merged = merged.union(level)
+
+        else:
+            merged = merged.difference(level)
+
+    return merged
+
 class Separator:
     """
         Create a polygon from extracted entities
@@ -30,9 +138,11 @@ class Separator:
 
         Attributes:
             elements(list): extracted entities converted into a Shapely form
+            grid_size(float): distance between division lines
+            is_curved(bool): divide polygons as curved or straight
     """
 
-    def __init__(self, elements):
+    def __init__(self, elements, grid_size=25, is_curved=True):
         """
             Initialize all the variables.
         """
@@ -46,10 +156,10 @@ class Separator:
         self.polygons = []
 
         # Variable holding grid size
-        self.grid_size = 25
+        self.grid_size = grid_size
 
         # Temporary variable telling us is polygon straight or curved
-        self.is_curved = True
+        self.is_curved = is_curved
 
         polygon_result:int = self.create_polygon()
         if polygon_result != 0:
@@ -114,7 +224,7 @@ class Separator:
                             self.polygons.append(entity)
 
                         case _:
-                            if element[0] != "DIMENSION": 
+                            if element[0] not in ("DIMENSION", "ARC_DIMENSION"):
                                 print("Unknown entity!")
 
         # If there are leftover lines, create a polygon from them
@@ -122,13 +232,47 @@ class Separator:
             if len(coords[element]) != 0:
                 self.polygons.append(Polygon(coords[element]))
 
-        # TODO: Make a function to merge only those polygons that are supposed to be merged
-        merged_polygon = unary_union(self.polygons)
-        self.polygons.clear()
-        self.polygons.append(merged_polygon)
+        self.polygons = self.merge_polygons(self.polygons)
 
         return 0
     
+    def merge_polygons(self, polygons) -> list:
+        """
+            Merge only those polygons that overlap or touch each
+            other and keep separate work areas apart.
+
+            Candidates are found with an STRtree so the cost depends
+            on the number of overlaps, not on the number of polygons.
+            Each cluster is merged on its own, in parallel.
+        """
+
+        if not polygons:
+            return []
+
+        # Assembled polygons can self-intersect, keep only their polygonal parts
+        polygons = shapely.get_parts(shapely.make_valid(np.array(polygons, dtype=object)))
+        polygons = polygons[shapely.get_type_id(polygons) == shapely.GeometryType.POLYGON]
+
+        tree = shapely.STRtree(polygons)
+
+        depths = nesting_depths(polygons, tree.query(polygons, predicate='covers'))
+
+        clusters = find_clusters(len(polygons), tree.query(polygons, predicate='intersects'))
+
+        # Single polygons need no merging
+        labels, counts = np.unique(clusters, return_counts=True)
+        merged = {label: polygons[label] for label in labels[counts == 1]}
+
+        groups = [np.flatnonzero(clusters == label) for label in labels[counts > 1]]
+        with ThreadPoolExecutor() as executor:
+            results = executor.map(lambda group: merge_cluster(polygons[group], depths[group]), groups)
+
+            for group, result in zip(groups, results):
+                merged[group[0]] = result
+
+        # Keep order in which polygons were found
+        return [merged[label] for label in sorted(merged) if not merged[label].is_empty]
+
     def create_divisions(self):
         """
             Unified function for creating divisions for each polygon
@@ -263,32 +407,7 @@ class Separator:
             Plot divided polygons on the screen.
         """
 
-        fig, ax = plt.subplots()
-        for polygon, division in zip(self.polygons, self.divisions):
-            if isinstance(polygon, Polygon):
-                # Plot the polygon
-                x, y = polygon.exterior.xy
-                ax.plot(x, y, color='black')
-
-            elif isinstance(polygon, MultiPolygon):
-                for geom in polygon.geoms:
-                    xs, ys = geom.exterior.xy    
-                    ax.fill(xs, ys, alpha=0.5, fc='r', ec='none')
-
-            # Plot the divisions
-            for line in division:
-                if isinstance(line, LineString):
-                    x, y = line.xy
-                    ax.plot(x, y, color='blue')
-                elif isinstance(line, Polygon):
-                    x, y = line.exterior.xy  # Fix: Directly get exterior coordinates
-                    ax.plot(x, y, color='blue')
-                elif isinstance(line, MultiPolygon):
-                    for geom in line.geoms:
-                        x, y = geom.exterior.xy
-                        ax.plot(x, y, color='blue')
-
-        plt.show()
+        plot_grid(self.polygons, self.divisions)
 
     def get_shapes(self):
         """
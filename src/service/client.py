@@ -0,0 +1,145 @@
+# AUTHOR Andrej Bartulin
+# PROJECT: B.A.G.E.R. parser
+# LICENSE: Polyform Shield License 1.0.0
+# DESCRIPTION: Parser service client and latency benchmark
+
+import http.client
+import json
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import time
+
+SRC_PATH = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+class UnixHTTPConnection(http.client.HTTPConnection):
+    """
+        HTTP connection over a Unix socket.
+    """
+
+    def __init__(self, path) -> None:
+        super().__init__("localhost")
+        self.socket_path = path
+
+    def connect(self) -> None:
+        self.sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self.sock.connect(self.socket_path)
+
+class Client:
+    """
+        Submit jobs to a running parser service.
+
+        Attributes:
+            host(str): service host, ignored if `socket` is set
+            port(int): service port, ignored if `socket` is set
+            socket(str): path to the Unix socket of the service
+    """
+
+    def __init__(self, host="127.0.0.1", port=8080, socket="") -> None:
+        """
+            Initialize all the variables.
+        """
+
+        self.host = host
+        self.port = port
+        self.socket = socket
+
+    def submit(self, job) -> bytes:
+        """
+            Submit a job and return binary output of the parser.
+        """
+
+        if self.socket:
+            connection = UnixHTTPConnection(self.socket)
+
+        else:
+            connection = http.client.HTTPConnection(self.host, self.port)
+
+        try:
+            connection.request("POST", "/job", json.dumps(job), {'Content-Type': "application/json"})
+            response = connection.getresponse()
+            output = response.read()
+
+            if response.status != 200:
+                raise RuntimeError(f"Job failed with {response.status}: {response.reason}")
+
+            return output
+
+        finally:
+            connection.close()
+
+def run_cold(job) -> bytes:
+    """
+        Run a job in a fresh interpreter, the same way
+        `python src/main.py` pays for start and imports.
+    """
+
+    code = (
+        "import contextlib, json, sys\n"
+        f"sys.path.insert(0, {SRC_PATH!r})\n"
+        "from service.service import process_job\n"
+        "with contextlib.redirect_stdout(sys.stderr):\n"
+        "    output = process_job(json.loads(sys.argv[1]))\n"
+        "sys.stdout.buffer.write(output)\n"
+    )
+
+    result = subprocess.run([sys.executable, "-c", code, json.dumps(job)], capture_output=True)
+
+    if result.returncode != 0:
+        raise RuntimeError(result.stderr.decode().strip().splitlines()[-1])
+
+    return result.stdout
+
+def benchmark(client, jobs, repeat=5) -> None:
+    """
+        Print cold (new process per job) and warm (service)
+        latency of every job.
+    """
+
+    print(f"{'job':<50} {'cold [ms]':>10} {'first [ms]':>11} {'warm [ms]':>10}")
+
+    for job in jobs:
+        name = os.path.basename(job['path'])
+
+        try:
+            start = time.perf_counter()
+            cold_output = run_cold(job)
+            cold = time.perf_counter() - start
+
+            # First request to the service fills the geometry cache
+            start = time.perf_counter()
+            warm_output = client.submit(job)
+            first = time.perf_counter() - start
+
+        except RuntimeError as error:
+            print(f"{name:<50} failed: {error}")
+            continue
+
+        warm = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            client.submit(job)
+            warm.append(time.perf_counter() - start)
+
+        if cold_output != warm_output:
+            print(f"Output of {name} differs between cold and warm run!")
+
+        print(f"{name:<50} {cold * 1000:>10.1f} {first * 1000:>11.1f} {statistics.median(warm) * 1000:>10.1f}")
+
+if __name__ == "__main__":
+    import toml
+
+    config_path = sys.argv[1] if len(sys.argv) > 1 else "config.toml"
+    config = toml.load(config_path).get('service', {})
+
+    client = Client(config.get('host', "127.0.0.1"), config.get('port', 8080), config.get('socket', ""))
+
+    paths = sys.argv[2:] or [os.path.join("dxf", name) for name in sorted(os.listdir("dxf"))]
+    jobs = [
+        {'path': os.path.abspath(path), 'extractor': "image" if path.endswith(".png") else "dxf"}
+        for path in paths
+    ]
+
+    benchmark(client, jobs)
@@ -0,0 +1,297 @@
+# AUTHOR Andrej Bartulin
+# PROJECT: B.A.G.E.R. parser
+# LICENSE: Polyform Shield License 1.0.0
+# DESCRIPTION: Parser service entry file
+
+import json
+import math
+import multiprocessing
+import os
+import signal
+import socketserver
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import numpy as np
+import shapely
+from shapely.geometry import GeometryCollection, MultiLineString
+
+# Heavy imports are done once here so every worker starts warm
+from pipeline.pipeline import Geometry, extract, separate
+
+# Size of chunks in which the binary output is streamed back
+CHUNK_SIZE = 64 * 1024
+
+# Default number of extracted drawings kept in the geometry cache
+CACHE_SIZE = 64
+
+# Default number of seconds a job may run before 504 is returned
+TIMEOUT = 60
+
+# Most division lines a job may create, fine grid on a big drawing takes forever
+MAX_LINES = 100000
+
+# Geometry cache shared by all workers and its size, set by `init_worker`
+cache = None
+cache_size = CACHE_SIZE
+
+def init_worker(shared_cache, size=CACHE_SIZE) -> None:
+    """
+        Initialize worker process.
+    """
+
+    global cache, cache_size
+    cache = shared_cache
+    cache_size = size
+
+    # Interrupt is handled by the service process, which closes the pool
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+
+def cache_key(job):
+    """
+        Return key identifying extracted geometry of a job.
+
+        Modification time and size are part of the key so an
+        edited drawing is extracted again.
+    """
+
+    path = os.path.realpath(job['path'])
+    stat = os.stat(path)
+
+    return (path, stat.st_mtime_ns, stat.st_size, job.get('extractor'), job.get('image_mode', "contour"))
+
+def store_geometry(key, entry) -> None:
+    """
+        Put extracted geometry into the cache, dropping older
+        versions of the same drawing and the oldest entries
+        once the cache is full.
+    """
+
+    # Other workers may evict the same keys at once, hence pop with default
+    for stale in [other for other in cache.keys() if other[0] == key[0] and other[1:3] != key[1:3]]:
+        cache.pop(stale, None)
+
+    cache[key] = entry
+
+    # Manager dict keeps insertion order, oldest entries come first
+    keys = cache.keys()
+    for old in keys[:max(0, len(keys) - cache_size)]:
+        cache.pop(old, None)
+
+def validate_job(job) -> None:
+    """
+        Raise ValueError if a job is malformed, so it is rejected
+        before it reaches the workers.
+    """
+
+    if not isinstance(job, dict) or not isinstance(job.get('path'), str):
+        raise ValueError("Job has no path!")
+
+    if job.get('extractor') not in (None, "dxf", "image"):
+        raise ValueError(f"Unknown extractor {job['extractor']}!")
+
+    if job.get('image_mode', "contour") not in ("contour", "hough"):
+        raise ValueError(f"Unknown image mode {job['image_mode']}!")
+
+    if not isinstance(job.get('is_curved', True), bool):
+        raise ValueError("is_curved has to be true or false!")
+
+    for name, minimum, exclusive in (('grid_size', 0, True), ('tolerance', 0, False), ('precision', 0, False)):
+        if name not in job:
+            continue
+
+        value = job[name]
+
+        # bool is an int subclass, but `true` is not a valid size
+        if isinstance(value, bool) or not isinstance(value, (int, float)) or not math.isfinite(value):
+            raise ValueError(f"{name} has to be a number!")
+
+        if value < minimum or (exclusive and value == minimum):
+            raise ValueError(f"{name} has to be {'greater than' if exclusive else 'at least'} {minimum}!")
+
+def load_geometry(job) -> Geometry:
+    """
+        Return extracted geometry of a job, either from the
+        cache or by running the extractor.
+    """
+
+    if not os.path.isfile(job['path']):
+        raise FileNotFoundError(f"File in path {job['path']} does not exist!")
+
+    key = cache_key(job)
+
+    if cache is not None:
+        cached = cache.get(key)
+        if cached is not None:
+            elements, scale = cached
+            return Geometry({element_type: list(shapely.from_wkb(geometries)) for element_type, geometries in elements.items()}, scale)
+
+    geometry = extract(job['path'], job.get('extractor'), job.get('image_mode', "contour"))
+
+    if cache is not None:
+        elements = {
+            element_type: shapely.to_wkb(np.array(geometries, dtype=object))
+            for element_type, geometries in geometry.elements.items()
+        }
+
+        store_geometry(key, (elements, geometry.scale))
+
+    return geometry
+
+def encode_shapes(polygons, divisions) -> bytes:
+    """
+        Encode polygons and their divisions into WKB.
+
+        Output is a collection holding a (polygon, division lines)
+        collection for each polygon.
+    """
+
+    shapes = [
+        GeometryCollection([polygon, MultiLineString(list(division))])
+        for polygon, division in zip(polygons, divisions)
+    ]
+
+    return shapely.to_wkb(GeometryCollection(shapes))
+
+def process_job(job) -> bytes:
+    """
+        Run extractor, simplifier and separator on a job and
+        return the binary output.
+
+        Job is a dictionary with `path`, `extractor`, `image_mode`,
+        `tolerance`, `precision`, `grid_size` and `is_curved` keys;
+        only `path` is required.
+    """
+
+    geometry = load_geometry(job)
+
+    # Division lines are `grid_size` apart across the height of the drawing
+    geometries = [entity for entities in geometry.elements.values() for entity in entities]
+    if geometries:
+        _, min_y, _, max_y = shapely.total_bounds(geometries)
+        lines = (max_y - min_y) / job.get('grid_size', 25)
+
+        if lines > MAX_LINES:
+            raise ValueError(f"grid_size {job.get('grid_size', 25)} creates {lines:.0f} division lines, at most {MAX_LINES} are allowed!")
+
+    divisions = separate(geometry, job)
+
+    return encode_shapes(divisions.polygons, divisions.divisions)
+
+class Handler(BaseHTTPRequestHandler):
+    """
+        HTTP handler accepting jobs as JSON at `POST /job`.
+    """
+
+    def do_POST(self) -> None:
+        if self.path != "/job":
+            self.send_error(404, f"Unknown endpoint {self.path}")
+            return
+
+        try:
+            length = int(self.headers.get('Content-Length', 0))
+            job = json.loads(self.rfile.read(length))
+
+            validate_job(job)
+
+        except ValueError as error:
+            self.send_error(400, str(error))
+            return
+
+        try:
+            output = self.server.pool.apply_async(process_job, (job,)).get(self.server.job_timeout)
+
+        except multiprocessing.TimeoutError:
+            self.send_error(504, f"Job did not finish in {self.server.job_timeout} s")
+            return
+
+        except FileNotFoundError as error:
+            self.send_error(404, str(error))
+            return
+
+        except ValueError as error:
+            self.send_error(400, str(error))
+            return
+
+        except Exception as error:
+            self.send_error(500, f"{type(error).__name__}: {error}")
+            return
+
+        self.send_response(200)
+        self.send_header('Content-Type', "application/octet-stream")
+        self.send_header('Content-Length', str(len(output)))
+        self.end_headers()
+
+        view = memoryview(output)
+        for start in range(0, len(view), CHUNK_SIZE):
+            self.wfile.write(view[start:start + CHUNK_SIZE])
+
+    def log_message(self, format, *args) -> None:
+        # Client address is empty on Unix sockets
+        print(f"[service] {format % args}")
+
+class UnixHTTPServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    """
+        HTTP server listening on a Unix socket.
+    """
+
+    daemon_threads = True
+
+    def get_request(self):
+        request, _ = super().get_request()
+
+        # BaseHTTPRequestHandler expects (host, port) address
+        return (request, ("local", 0))
+
+class Service:
+    """
+        Long running parser keeping a pool of warm worker processes
+        and accepting jobs on localhost.
+
+        Attributes:
+            config(dict): `service` table of the config file
+    """
+
+    def __init__(self, config) -> None:
+        """
+            Initialize all the variables.
+        """
+
+        self.host = config.get('host', "127.0.0.1")
+        self.port = config.get('port', 8080)
+        self.socket = config.get('socket', "")
+        self.workers = config.get('workers', os.cpu_count())
+        self.cache_size = config.get('cache_size', CACHE_SIZE)
+        self.timeout = config.get('timeout', TIMEOUT)
+
+    def execute(self) -> None:
+        """
+            Start workers and serve jobs until interrupted.
+        """
+
+        with multiprocessing.Manager() as manager:
+            with multiprocessing.Pool(self.workers, init_worker, (manager.dict(), self.cache_size)) as pool:
+                if self.socket:
+                    if os.path.exists(self.socket):
+                        os.remove(self.socket)
+
+                    server = UnixHTTPServer(self.socket, Handler)
+                    print(f"Listening on {self.socket}")
+
+                else:
+                    server = ThreadingHTTPServer((self.host, self.port), Handler)
+                    print(f"Listening on http://{self.host}:{self.port}")
+
+                server.pool = pool
+                server.job_timeout = self.timeout
+
+                try:
+                    server.serve_forever()
+
+                except KeyboardInterrupt:
+                    print("Exiting...")
+
+                finally:
+                    server.server_close()
+
+                    if self.socket and os.path.exists(self.socket):
+                        os.remove(self.socket)
@@ -0,0 +1,110 @@
+# AUTHOR Andrej Bartulin
+# PROJECT: B.A.G.E.R. parser
+# LICENSE: Polyform Shield License 1.0.0
+# DESCRIPTION: Simplifier vertex reduction and division speedup benchmark
+
+import os
+import sys
+import time
+
+import shapely
+
+from extractor.dxf import DXF
+from extractor.image import Image
+from scaler.scaler import Scaler
+from separator.separator import Separator
+from simplifier.simplifier import Simplifier
+
+def load(path):
+    """
+        Extract and scale elements of a sample.
+    """
+
+    if path.endswith(".png"):
+        extractor = Image(path, output_path=None)
+        extractor.execute()
+
+    else:
+        extractor = DXF(path)
+
+    elements = extractor.get_elements()
+
+    scaler = Scaler(elements)
+    scaler.execute()
+
+    return elements
+
+def divide(elements, grid_size, repeat):
+    """
+        Return best time of running the separator and
+        the polygons it created.
+    """
+
+    best = float("inf")
+
+    for _ in range(repeat):
+        start = time.perf_counter()
+        separator = Separator(elements, grid_size)
+        best = min(best, time.perf_counter() - start)
+
+    return (best, separator.get_shapes()[0])
+
+def compare(raw, simplified, tolerance):
+    """
+        Return None if simplified polygons dig the same area
+        as raw ones, otherwise the reason why they do not.
+
+        Simplified boundary may move by `tolerance`, so areas
+        may differ by up to `tolerance` times its length.
+    """
+
+    if len(raw) != len(simplified):
+        return f"{len(raw)} -> {len(simplified)} polygons"
+
+    # Polygon may also fall apart into several (or join from several) parts
+    raw_parts, simplified_parts = len(shapely.get_parts(raw)), len(shapely.get_parts(simplified))
+    if raw_parts != simplified_parts:
+        return f"{raw_parts} -> {simplified_parts} parts"
+
+    raw, simplified = shapely.union_all(raw), shapely.union_all(simplified)
+
+    difference = raw.symmetric_difference(simplified).area
+    allowed = tolerance * raw.boundary.length
+
+    if difference > allowed:
+        return f"area differs by {difference:.1f} (allowed {allowed:.1f})"
+
+    return None
+
+def benchmark(paths, tolerance=0.5, precision=0.01, grid_size=1, repeat=5) -> None:
+    """
+        Print vertex count and division time of every sample
+        without and with simplification.
+    """
+
+    print(f"{'sample':<40} {'vertices':>17} {'raw [ms]':>9} {'simplified [ms]':>16} {'speedup':>8}")
+
+    for path in paths:
+        elements = load(path)
+        raw, raw_polygons = divide(elements, grid_size, repeat)
+
+        simplifier = Simplifier(elements, tolerance, precision)
+        simplifier.execute()
+        before, after = simplifier.get_vertices()
+
+        simplified, simplified_polygons = divide(elements, grid_size, repeat)
+
+        # Speedup means nothing if different geometry was divided
+        reason = compare(raw_polygons, simplified_polygons, tolerance)
+        speedup = f"{raw / simplified:>7.2f}x" if reason is None else f"skipped, {reason}"
+
+        print(f"{os.path.basename(path):<40} {before:>8} -> {after:<6} {raw * 1000:>9.1f} {simplified * 1000:>16.1f} {speedup:>8}")
+
+if __name__ == "__main__":
+    paths = sys.argv[1:] or [
+        os.path.join(directory, name)
+        for directory in ("dxf", "image")
+        for name in sorted(os.listdir(directory))
+    ]
+
+    benchmark(paths)
@@ -0,0 +1,128 @@
+# AUTHOR Andrej Bartulin
+# PROJECT: B.A.G.E.R. parser
+# LICENSE: Polyform Shield License 1.0.0
+# DESCRIPTION: Simplifier entry file
+
+import numpy as np
+import shapely
+from shapely.geometry.base import BaseGeometry
+
+class Simplifier:
+    """
+        Reduce number of vertices of extracted entities before
+        they are divided.
+
+        Attributes:
+            elements(dict): extracted entities converted into a Shapely form
+            tolerance(float): maximal distance simplified geometry may move (machine tolerance)
+            precision(float): size of the grid vertices are snapped to
+    """
+
+    def __init__(self, elements, tolerance=0.5, precision=0.01):
+        """
+            Initialize all the variables.
+        """
+
+        self.elements = elements
+        self.tolerance = tolerance
+        self.precision = precision
+
+        # Number of vertices before and after simplification
+        self.vertices = (0, 0)
+
+    def execute(self) -> None:
+        """
+            Simplify, snap and remove duplicate vertices of all
+            geometry at once.
+        """
+
+        keys = []
+        geometries = []
+
+        for element_type, entities in self.elements.items():
+            for i, entity in enumerate(entities):
+                if isinstance(entity, BaseGeometry):
+                    keys.append((element_type, i))
+                    geometries.append(entity)
+
+        if geometries:
+            geometries = np.array(geometries, dtype=object)
+            before = int(shapely.get_num_coordinates(geometries).sum())
+
+            if self.tolerance > 0:
+                geometries = shapely.simplify(geometries, self.tolerance, preserve_topology=True)
+
+            if self.precision > 0:
+                original = geometries
+                geometries = shapely.set_precision(geometries, self.precision)
+
+                # Keep snapped coordinates but drop the fixed precision model,
+                # overlay operations with it are much slower
+                geometries = shapely.set_precision(geometries, 0)
+
+                geometries = self.restore_endpoints(original, geometries)
+
+            geometries = shapely.remove_repeated_points(geometries)
+            after = int(shapely.get_num_coordinates(geometries).sum())
+
+            for (element_type, i), geometry in zip(keys, geometries):
+                self.elements[element_type][i] = geometry
+
+            # Geometry smaller than the precision grid collapses, drop it
+            for element_type, entities in self.elements.items():
+                self.elements[element_type] = [
+                    entity for entity in entities
+                    if not (isinstance(entity, BaseGeometry) and entity.is_empty)
+                ]
+
+            self.vertices = (before, after)
+
+        # Points from image extractor are plain tuples, snap them and drop duplicates
+        if self.elements['POINTS'] and self.precision > 0:
+            points = np.round(np.asarray(self.elements['POINTS'], dtype=float) / self.precision) * self.precision
+            _, first = np.unique(points, axis=0, return_index=True)
+
+            self.elements['POINTS'] = [tuple(point) for point in points[np.sort(first)]]
+
+    def restore_endpoints(self, original, snapped):
+        """
+            Put back original end points of every line.
+
+            Separator joins lines into polygons by comparing their
+            end points, snapping them could join lines which were
+            apart (or split ones which were joined) and change the
+            area to dig. Lines collapsed by snapping are kept as
+            a segment between their end points for the same reason.
+        """
+
+        snapped = snapped.copy()
+
+        lines = np.flatnonzero((shapely.get_type_id(original) == shapely.GeometryType.LINESTRING) & ~shapely.is_empty(original))
+        if len(lines) == 0:
+            return snapped
+
+        starts = shapely.get_coordinates(shapely.get_point(original[lines], 0))
+        ends = shapely.get_coordinates(shapely.get_point(original[lines], -1))
+
+        collapsed = shapely.is_empty(snapped[lines])
+        if np.any(collapsed):
+            snapped[lines[collapsed]] = shapely.linestrings(np.stack((starts[collapsed], ends[collapsed]), axis=1))
+
+        # Coordinates of all lines are concatenated, find where each one starts and ends
+        coords = shapely.get_coordinates(snapped[lines])
+        last = np.cumsum(shapely.get_num_coordinates(snapped[lines])) - 1
+        first = np.concatenate(([0], last[:-1] + 1))
+
+        coords[first] = starts
+        coords[last] = ends
+
+        snapped[lines] = shapely.set_coordinates(snapped[lines], coords)
+
+        return snapped
+
+    def get_vertices(self):
+        """
+            Return number of vertices before and after simplification.
+        """
+
+        return self.vertices